@@ -1,10 +1,17 @@
 # backend/app.py
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, send_from_directory
 from flask_cors import CORS
+from flask_compress import Compress
+from whitenoise import WhiteNoise
+import numpy as np
+import orjson
+import msgspec
 import os
 import random
 import hashlib
+import functools
+from typing import Optional, Tuple, Union
 
 # -------------------------------------------------------------------
 # Flask app + static config
@@ -14,17 +21,65 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 
 app = Flask(__name__, static_folder=STATIC_DIR, static_url_path="/static")
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+
+FLASK_WSGI_APP = app.wsgi_app
+
+
+def serve_static(autorefresh: bool = False):
+    """
+    Put WhiteNoise in front of Flask: it answers static requests (at /static/
+    and at the site root) before they reach Flask, picking up precompressed
+    .br/.gz siblings when present. Without `autorefresh` it snapshots every
+    file's headers at startup, so edited files would be served with stale
+    lengths until a restart – fine in production, wrong while developing.
+    """
+    # Assets aren't content-hashed, so keep max_age short; ETags make revalidation cheap.
+    static = WhiteNoise(FLASK_WSGI_APP, root=STATIC_DIR, prefix="/static/",
+                        max_age=3600, autorefresh=autorefresh)
+    static.add_files(STATIC_DIR, prefix="/")
+    app.wsgi_app = static
+
+
+# PIXELSAGA_AUTOREFRESH=1 re-reads static files per request (dev under gunicorn etc.)
+serve_static(autorefresh=os.environ.get("PIXELSAGA_AUTOREFRESH") == "1")
+# cache preflights for a day so browsers skip the OPTIONS round-trip
+CORS(app, resources={r"/api/*": {"origins": "*", "max_age": 86400}})
+
+# br/gzip-compress JSON + text responses (map payloads are highly repetitive)
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 512
+Compress(app)
+
+
+def _encode_extra(obj):
+    # NumPy id arrays (world_gen payloads) become lists only here, at the edge
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise NotImplementedError(f"cannot encode {type(obj).__name__}")
+
+
+JSON_ENCODER = msgspec.json.Encoder(enc_hook=_encode_extra)
+
+
+def json_response(obj, status: int = 200):
+    """Like flask.jsonify, but encodes in C with msgspec (also handles Tile structs
+    and NumPy arrays)."""
+    return app.response_class(JSON_ENCODER.encode(obj), status=status, mimetype="application/json")
+
 
 # -------------------------------------------------------------------
 # Deterministic RNG helpers
 # -------------------------------------------------------------------
 
-def rng_from_string(seed_str: str) -> random.Random:
-    """Turn any string/int into a deterministic Random() instance."""
-    h = hashlib.sha256(str(seed_str).encode("utf-8")).hexdigest()
-    num = int(h[:16], 16)  # 64-bit chunk
-    return random.Random(num)
+def seed_bytes(seed_str: str, n: int) -> bytes:
+    """n (<= 64) deterministic bytes for a key; blake2b is stable across machines."""
+    return hashlib.blake2b(seed_str.encode("utf-8"), digest_size=n).digest()
+
+
+@functools.lru_cache(maxsize=8192)
+def _seed_int(seed_str: str) -> int:
+    # 64-bit seed for PRNGs that need a longer stream than seed_bytes() gives
+    return int.from_bytes(seed_bytes(seed_str, 8), "big")
 
 
 def ensure_user_seed(raw_seed):
@@ -38,6 +93,16 @@ def ensure_user_seed(raw_seed):
 # MAP CATALOG (tile palette per genre)
 # -------------------------------------------------------------------
 
+class Tile(msgspec.Struct, frozen=True):
+    """One palette entry; slotted and immutable, so tiles can share it freely."""
+    symbol: str
+    cls: str = msgspec.field(name="class")  # "class" in JSON
+    name: str
+    resources: Tuple[str, ...]
+    difficulty: str
+    flavor: str
+
+
 MAP_CATALOG = {
     "fantasy": [
         {"symbol": "G", "class": "fantasy-grass",   "name": "Grass",    "resources": ["Herbs"],         "difficulty": "Easy",        "flavor": "Open emerald plains."},
@@ -73,14 +138,28 @@ MAP_CATALOG = {
     ],
 }
 
+# freeze the literal palettes above into tuples of Tile structs
+MAP_CATALOG = {
+    theme: tuple(msgspec.convert(tile, Tile) for tile in palette)
+    for theme, palette in MAP_CATALOG.items()
+}
+
 # -------------------------------------------------------------------
 # WORLD GENERATION HELPERS
 # -------------------------------------------------------------------
 
 def build_map_grid(theme: str, size: str, seed: int):
     """Simple deterministic map generator used by /api/generate-map."""
+    return _build_map_grid_cached(theme, size, seed)
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_map_grid_cached(theme: str, size: str, seed: int):
+    # Output is a pure function of (theme, size, seed), so repeat requests
+    # (shared map links, re-renders) are served from the cache. Tiles are
+    # frozen to a tuple because the cached copy is shared between callers.
     palette = MAP_CATALOG.get(theme, MAP_CATALOG["fantasy"])
-    rng = rng_from_string(f"map:{theme}:{size}:{seed}")
+    seed_int = _seed_int(f"map:{theme}:{size}:{seed}")
 
     if size == "small":
         cell_count, columns = 100, 10
@@ -89,48 +168,46 @@ def build_map_grid(theme: str, size: str, seed: int):
     else:
         cell_count, columns = 400, 20
 
-    tiles = []
-    for _ in range(cell_count):
-        tile_def = rng.choice(palette)
-        tiles.append(
-            {
-                "symbol": tile_def["symbol"],
-                "class": tile_def["class"],
-                "name": tile_def["name"],
-                "resources": tile_def["resources"],
-                "difficulty": tile_def["difficulty"],
-                "flavor": tile_def["flavor"],
-            }
-        )
+    # one vectorized PCG64 draw for the whole grid instead of a choice() per
+    # tile; tiles alias the (immutable) palette entries rather than copying them
+    indices = np.random.default_rng(seed_int).integers(0, len(palette), size=cell_count)
+    tiles = tuple([palette[i] for i in indices.tolist()])
 
     return tiles, columns
 
 
-def build_quest(theme: str, size: str, seed: int):
-    """Deterministic quest beats for /api/generate-quest."""
-    rng = rng_from_string(f"quest:{theme}:{size}:{seed}")
-
-    titles = ["Recovery", "Rescue", "Heist", "Escort", "Scan"]
-    locations = {
-        "fantasy": ["Ancient Ruins", "Crystal Forest", "Sunken Keep"],
-        "sci-fi": ["Orbital Relay", "Abandoned Complex", "Crystal Belt"],
-        "post-apoc": ["Crater City", "Dust Highway", "Flooded Mall"],
-        "cyberpunk": ["Neon District", "Corporate Spire", "Dockside Grid"],
-    }
-    diffs = ["Easy", "Medium", "Hard"]
+QUEST_TITLES = ["Recovery", "Rescue", "Heist", "Escort", "Scan"]
 
-    title = rng.choice(titles)
-    location = rng.choice(locations.get(theme, locations["fantasy"]))
-    difficulty = rng.choice(diffs)
+QUEST_LOCATIONS = {
+    "fantasy": ["Ancient Ruins", "Crystal Forest", "Sunken Keep"],
+    "sci-fi": ["Orbital Relay", "Abandoned Complex", "Crystal Belt"],
+    "post-apoc": ["Crater City", "Dust Highway", "Flooded Mall"],
+    "cyberpunk": ["Neon District", "Corporate Spire", "Dockside Grid"],
+}
+
+QUEST_DIFFICULTIES = ["Easy", "Medium", "Hard"]
 
-    # Emoji per step (UI: 💠-style beat markers)
-    step_icons = ["🧭", "🎯", "🚀", "📦", "🏁"]
-    raw_steps = ["Travel to location", "Complete objective", "Return safely"]
+# Emoji per step (UI: 💠-style beat markers)
+QUEST_STEP_ICONS = ["🧭", "🎯", "🚀", "📦", "🏁"]
+QUEST_RAW_STEPS = ["Travel to location", "Complete objective", "Return safely"]
 
-    steps = []
-    for i, label in enumerate(raw_steps):
-        icon = step_icons[i] if i < len(step_icons) else "•"
-        steps.append({"label": label, "icon": icon})
+# steps only depend on the two constants above, so build them once
+QUEST_STEPS = [
+    {"label": label, "icon": QUEST_STEP_ICONS[i] if i < len(QUEST_STEP_ICONS) else "•"}
+    for i, label in enumerate(QUEST_RAW_STEPS)
+]
+
+
+@functools.lru_cache(maxsize=1024)
+def build_quest(theme: str, size: str, seed: int):
+    """Deterministic quest beats for /api/generate-quest (cached; treat as read-only)."""
+    # only three picks are needed, so read them straight off one small digest
+    d = seed_bytes(f"quest:{theme}:{size}:{seed}", 3)
+    locations = QUEST_LOCATIONS.get(theme, QUEST_LOCATIONS["fantasy"])
+
+    title = QUEST_TITLES[d[0] % len(QUEST_TITLES)]
+    location = locations[d[1] % len(locations)]
+    difficulty = QUEST_DIFFICULTIES[d[2] % len(QUEST_DIFFICULTIES)]
 
     description = f"{title} at {location} (Difficulty: {difficulty})."
 
@@ -140,8 +217,8 @@ def build_quest(theme: str, size: str, seed: int):
         "title": title,
         "location": location,
         "difficulty": difficulty,
-        "steps": steps,          # richer structure (with emoji)
-        "raw_steps": raw_steps,  # simple list, for backwards compatibility
+        "steps": QUEST_STEPS,          # richer structure (with emoji)
+        "raw_steps": QUEST_RAW_STEPS,  # simple list, for backwards compatibility
         "description": description,
         "description_ai": description,
     }
@@ -174,21 +251,37 @@ ELEMENT_TITLE = {
     "Cyber": "Systems",
 }
 
+ENHANCEMENT_FLAVOR = {
+    "Fire": "Glows faintly with internal embers.",
+    "Ice": "Always feels a few degrees colder than the air.",
+    "Poison": "Carries a subtle iridescent sheen along its edges.",
+    "Cyber": "Laced with humming circuitry along the core.",
+    "None": "Reliable hardware with no visible distortions.",
+}
 
-def build_asset(theme: str, seed: int, data: dict):
+
+def build_asset(theme: str, seed: int, req: "AssetRequest"):
     """Core logic for the Asset Forge; deterministic for a given config."""
-    asset_type = (data.get("type") or data.get("asset_type") or "Weapon").strip().title()
-    material = (data.get("material") or "Iron").strip().title()
-    enhancement = (data.get("enhancement") or "None").strip().title()
-    rarity = (data.get("rarity") or "Common").strip().title()
-    power = int(data.get("power") or 1)
-    value_slider = int(data.get("value") or data.get("value_mod") or 1)
+    asset_type = (req.type or req.asset_type or "Weapon").strip().title()
+    material = (req.material or "Iron").strip().title()
+    enhancement = (req.enhancement or "None").strip().title()
+    rarity = (req.rarity or "Common").strip().title()
+    power = req.power or 1
+    value_slider = req.value or req.value_mod or 1
 
     power = max(1, min(power, 10))
     value_slider = max(1, min(value_slider, 10))
 
-    # RNG salted by all parameters → deterministic holo-item
-    rng = rng_from_string(f"asset:{theme}:{seed}:{asset_type}:{material}:{rarity}:{power}:{value_slider}")
+    return _build_asset_cached(
+        theme, seed, asset_type, material, enhancement, rarity, power, value_slider
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _build_asset_cached(theme: str, seed: int, asset_type: str, material: str,
+                        enhancement: str, rarity: str, power: int, value_slider: int):
+    # Pure function of the normalized params, so slider tweaks that land on a
+    # previous config are cache hits. The returned asset dict is shared.
 
     rarity_mult = RARITY_MULTIPLIER.get(rarity, 1.0)
     base_val = BASE_VALUE.get(asset_type, 100)
@@ -202,13 +295,7 @@ def build_asset(theme: str, seed: int, data: dict):
     desc = f"A {rarity.lower()} {asset_type.lower()} crafted from {material.lower()}."
 
     # extra flavour per theme / enhancement
-    extra = {
-        "Fire": "Glows faintly with internal embers.",
-        "Ice": "Always feels a few degrees colder than the air.",
-        "Poison": "Carries a subtle iridescent sheen along its edges.",
-        "Cyber": "Laced with humming circuitry along the core.",
-        "None": "Reliable hardware with no visible distortions.",
-    }.get(enhancement, "")
+    extra = ENHANCEMENT_FLAVOR.get(enhancement, "")
 
     full_flavor = (desc + " " + extra).strip()
 
@@ -233,25 +320,157 @@ def build_asset(theme: str, seed: int, data: dict):
     return asset, forge_status
 
 
+# -------------------------------------------------------------------
+# REQUEST SCHEMAS (msgspec: validated + coerced in C)
+# -------------------------------------------------------------------
+
+# orjson decodes integers past 64 bits as floats, so integral floats are seeds too
+Seed = Optional[Union[int, float, str]]
+
+
+def coerce_seed(raw_seed: Seed) -> Optional[int]:
+    """Normalize a request seed to an int (None if absent); ValueError if it isn't one."""
+    if raw_seed is None or raw_seed == "":
+        return None
+    if isinstance(raw_seed, float):
+        if not raw_seed.is_integer():
+            raise ValueError(f"seed must be an integer, got {raw_seed!r}")
+        return int(raw_seed)
+    try:
+        return int(str(raw_seed))
+    except ValueError:
+        raise ValueError(f"seed must be an integer, got {raw_seed!r}") from None
+
+
+class MapRequest(msgspec.Struct):
+    """Body of /api/generate-map and /api/generate-quest."""
+    theme: Optional[str] = "fantasy"
+    size: Optional[str] = "small"
+    seed: Seed = None
+
+    def __post_init__(self):
+        # msgspec reports a ValueError raised here as a ValidationError (-> 400)
+        self.seed = coerce_seed(self.seed)
+
+    @property
+    def raw_seed(self) -> Seed:
+        return self.seed
+
+
+class AssetRequest(msgspec.Struct):
+    """Body of /api/generate-asset; aliases mirror what old frontends send."""
+    theme: Optional[str] = "fantasy"
+    seed: Seed = None
+    map_seed: Seed = None
+    quest_seed: Seed = None
+    type: Optional[str] = None
+    asset_type: Optional[str] = None
+    material: Optional[str] = None
+    enhancement: Optional[str] = None
+    rarity: Optional[str] = None
+    power: Optional[int] = None
+    value: Optional[int] = None
+    value_mod: Optional[int] = None
+
+    def __post_init__(self):
+        self.seed = coerce_seed(self.seed)
+        self.map_seed = coerce_seed(self.map_seed)
+        self.quest_seed = coerce_seed(self.quest_seed)
+
+    @property
+    def raw_seed(self) -> Seed:
+        return self.seed or self.map_seed or self.quest_seed
+
+
+def read_json_body():
+    """Decode the raw request body with orjson; unreadable bodies count as {}."""
+    try:
+        return orjson.loads(request.get_data()) or {}
+    except orjson.JSONDecodeError:
+        return {}
+
+
+def parse_body(data, schema):
+    """Coerce a decoded JSON body into `schema` (numeric strings are accepted)."""
+    return msgspec.convert(data, schema, strict=False)
+
+
+def read_request(schema):
+    """Decode + validate the request (JSON body, or query string for GET) and
+    resolve its user seed (once)."""
+    data = request.args.to_dict() if request.method == "GET" else read_json_body()
+    req = parse_body(data, schema)
+    return req, ensure_user_seed(req.raw_seed)
+
+
 # -------------------------------------------------------------------
 # API ROUTES
 # -------------------------------------------------------------------
 
+# map/quest output is a pure function of the request, so it never goes stale
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Salted into every ETag. Bump it whenever a generator's output for the same
+# (theme, size, seed) changes, or caches keep serving the old result.
+GENERATOR_VERSION = 2
+
+
+def deterministic_etag(key: str) -> str:
+    """ETag for a generator result; the key is the same one that seeds its RNG."""
+    return f"ps-{_seed_int(f'v{GENERATOR_VERSION}:{key}'):016x}"
+
+
+def is_cacheable(req) -> bool:
+    # Only GETs can be cached or revalidated (browsers never send If-None-Match
+    # on a POST), and only a client-pinned seed makes the response repeatable.
+    return request.method == "GET" and req.raw_seed is not None
+
+
+def with_cache_headers(resp, etag: str):
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return resp
+
+
+def not_modified(etag: str):
+    """304 response if the client already holds `etag`, else None."""
+    # Flask-Compress tags compressed bodies as "<etag>:<algorithm>"
+    variants = [etag] + [f"{etag}:{alg}" for alg in app.config["COMPRESS_ALGORITHM"]]
+    for tag in variants:
+        if request.if_none_match.contains(tag):
+            return with_cache_headers(app.response_class(status=304), tag)
+    return None
+
+
+@app.errorhandler(msgspec.ValidationError)
+def handle_bad_request_body(err):
+    return json_response({"status": "error", "error": str(err)}, status=400)
+
+
+# health-check payload never changes, so encode it once
+STATUS_BODY = JSON_ENCODER.encode({"status": "ok", "service": "pixelsaga", "version": "dev"})
+
+
 @app.route("/api/status", methods=["GET"])
 def api_status():
-    return jsonify({"status": "ok", "service": "pixelsaga", "version": "dev"}), 200
+    return app.response_class(STATUS_BODY, status=200, mimetype="application/json")
 
 
-@app.route("/api/generate-map", methods=["POST"])
+@app.route("/api/generate-map", methods=["GET", "POST"])
 def api_generate_map():
-    data = request.get_json(force=True) or {}
-    theme = data.get("theme", "fantasy")
-    size = data.get("size", "small")
-    user_seed = ensure_user_seed(data.get("seed"))
+    req, user_seed = read_request(MapRequest)
+    theme = req.theme
+    size = req.size
+    cacheable = is_cacheable(req)
+
+    etag = deterministic_etag(f"map:{theme}:{size}:{user_seed}")
+    cached = not_modified(etag) if cacheable else None
+    if cached is not None:
+        return cached
 
     tiles, columns = build_map_grid(theme, size, user_seed)
 
-    return jsonify(
+    resp = json_response(
         {
             "status": "success",
             "theme": theme,
@@ -262,28 +481,31 @@ def api_generate_map():
             "grid_columns": columns,
         }
     )
+    return with_cache_headers(resp, etag) if cacheable else resp
 
 
-@app.route("/api/generate-quest", methods=["POST"])
+@app.route("/api/generate-quest", methods=["GET", "POST"])
 def api_generate_quest():
-    data = request.get_json(force=True) or {}
-    theme = data.get("theme", "fantasy")
-    size = data.get("size", "small")
-    user_seed = ensure_user_seed(data.get("seed"))
+    req, user_seed = read_request(MapRequest)
+    theme = req.theme
+    size = req.size
+    cacheable = is_cacheable(req)
+
+    etag = deterministic_etag(f"quest:{theme}:{size}:{user_seed}")
+    cached = not_modified(etag) if cacheable else None
+    if cached is not None:
+        return cached
 
-    quest = build_quest(theme, size, user_seed)
-    return jsonify(quest)
+    resp = json_response(build_quest(theme, size, user_seed))
+    return with_cache_headers(resp, etag) if cacheable else resp
 
 
 @app.route("/api/generate-asset", methods=["POST"])
 def api_generate_asset():
-    data = request.get_json(force=True) or {}
-    theme = data.get("theme", "fantasy")
-    user_seed = ensure_user_seed(
-        data.get("seed") or data.get("map_seed") or data.get("quest_seed")
-    )
+    req, user_seed = read_request(AssetRequest)
+    theme = req.theme
 
-    asset, forge_status = build_asset(theme, user_seed, data)
+    asset, forge_status = build_asset(theme, user_seed, req)
 
     # include both new + legacy fields so script.js is happy
     response = {
@@ -303,7 +525,7 @@ def api_generate_asset():
         "flavor": asset["flavor"],
     }
 
-    return jsonify(response), 200
+    return json_response(response)
 
 
 # -------------------------------------------------------------------
@@ -317,10 +539,7 @@ def index_route():
 
 @app.route("/<path:filename>", methods=["GET"])
 def serve_static_root(filename):
-    path = os.path.join(STATIC_DIR, filename)
-    if os.path.exists(path):
-        return send_from_directory(STATIC_DIR, filename)
-    # SPA fallback → index.html
+    # real files are served by WhiteNoise, so anything here is an SPA route
     return send_from_directory(STATIC_DIR, "index.html")
 
 
@@ -330,4 +549,8 @@ def serve_static_root(filename):
 
 if __name__ == "__main__":
     print("Starting PixelSaga backend. static dir:", STATIC_DIR)
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    # waitress is multi-threaded (and works on Windows), so concurrent
+    # map/quest/asset requests from the UI don't queue behind each other
+    from waitress import serve
+    serve_static(autorefresh=True)  # local dev: pick up edited CSS/JS without a restart
+    serve(app, host="127.0.0.1", port=5000, threads=8)
@@ -0,0 +1,22 @@
+# backend/gunicorn_conf.py
+"""
+Production server config for PixelSaga.
+
+Run from the `backend` directory:
+    gunicorn -c gunicorn_conf.py app:app
+
+The generators are pure CPU work, so we scale with one worker process per
+core and a few threads each to overlap socket I/O.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("PIXELSAGA_BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = 4
+
+# import the app once in the master so MAP_CATALOG & friends are fork-shared
+preload_app = True
@@ -22,39 +22,28 @@ class SeedBundle:
     asset_seed: int
 
 
-def _hash_to_int(key: str) -> int:
-    """
-    Hash a string into a stable 32-bit integer.
-    We use sha256 so result is identical on every machine.
-    """
-    h = hashlib.sha256(key.encode("utf-8")).hexdigest()
-    # take first 8 hex chars -> 32 bits
-    return int(h[:8], 16)
-
-
 def derive_seeds(theme: str, size: str, user_seed: int) -> SeedBundle:
     """
     Canonical way to turn (theme, size, user_seed) into deterministic seeds.
 
+    One 16-byte blake2b digest of the key is split into four 32-bit seeds,
+    so result is identical on every machine and costs a single hash.
+
     Example key:
-        "map|fantasy|small|734974587"
+        "fantasy|small|734974587"
     """
     theme = (theme or "fantasy").lower()
     size = (size or "small").lower()
     user_seed = int(user_seed)
 
-    base_key = f"base|{theme}|{size}|{user_seed}"
-    base = _hash_to_int(base_key)
-
-    map_key = f"map|{theme}|{size}|{user_seed}"
-    quest_key = f"quest|{theme}|{size}|{user_seed}"
-    asset_key = f"asset|{theme}|{size}|{user_seed}"
+    key = f"{theme}|{size}|{user_seed}"
+    d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
 
     return SeedBundle(
-        base=base,
-        map_seed=_hash_to_int(map_key),
-        quest_seed=_hash_to_int(quest_key),
-        asset_seed=_hash_to_int(asset_key),
+        base=int.from_bytes(d[0:4], "big"),
+        map_seed=int.from_bytes(d[4:8], "big"),
+        quest_seed=int.from_bytes(d[8:12], "big"),
+        asset_seed=int.from_bytes(d[12:16], "big"),
     )
 
 
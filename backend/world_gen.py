@@ -9,18 +9,35 @@ Adds multiple algorithms:
 - Voronoi biome regions
 
 All functions are deterministic given (seed, theme, size).
+Generators return a structure-of-arrays payload (see _grid_payload) with
+NumPy id arrays; expand_cells() turns it back into one dict per cell.
 """
 
+import functools
 import math
-import random
+import operator
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    # pip install numba  (optional: JIT-compiles the cave smoothing for big maps)
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
 try:
-    # pip install noise
-    from noise import pnoise2
+    # optional: numba's CUDA target smooths huge cave grids on the GPU
+    from numba import cuda
 except ImportError:
-    pnoise2 = None  # we’ll fall back to simple value noise
+    cuda = None
+
+try:
+    # pip install scipy  (optional: O(W·H) Voronoi for many regions)
+    from scipy.ndimage import distance_transform_edt
+except ImportError:
+    distance_transform_edt = None
 
 
 # ---------------------------------------------------------
@@ -121,195 +138,430 @@ SIZE_PRESETS = {
 }
 
 
+# Noise octaves per size. Every preset samples the noise at the same
+# 1/12 step per cell, so a smaller map doesn't hide fine detail: dropping
+# to 2–3 octaves moved 12–25% of cells to another biome. Kept at 4 for
+# all sizes; the table stays as the per-size knob.
+NOISE_OCTAVES = {
+    "small": 4,
+    "medium": 4,
+    "large": 4,
+}
+
+
 def _pick_size(size: str) -> Tuple[int, int]:
     return SIZE_PRESETS.get(size, SIZE_PRESETS["small"])
 
 
-def _cell_payload(tile: TileDef, x: int, y: int, biome: str) -> Dict:
-    """Convert a TileDef into the JSON object the frontend expects."""
-    return {
-        "x": x,
-        "y": y,
+def _pick_octaves(size: str) -> int:
+    return NOISE_OCTAVES.get(size, NOISE_OCTAVES["small"])
+
+
+def _rng(seed: int) -> np.random.Generator:
+    # PCG64 wants a non-negative seed; random.Random took any int
+    return np.random.default_rng(seed & 0xFFFFFFFFFFFFFFFF)
+
+
+# Per-tile part of the JSON object the frontend expects, built once.
+# `resources` lists are shared between cells – the frontend only reads them.
+TILE_TEMPLATE: Dict[str, Dict] = {
+    key: {
         "name": tile.name,
         "symbol": tile.symbol if tile.symbol != "=" else tile.name[0].upper(),
         "resources": tile.resources,
         "difficulty": tile.difficulty,
         "flavor": tile.flavor,
-        "biome": biome,  # CSS hook for different colors
+    }
+    for key, tile in BASE_TILES.items()
+}
+
+
+# tile id -> tile key / template; the ids are what generators put on the wire
+TILE_KEYS: Tuple[str, ...] = tuple(BASE_TILES)
+TILE_IDS: Dict[str, int] = {key: i for i, key in enumerate(TILE_KEYS)}
+TILE_LEGEND: List[Dict] = [TILE_TEMPLATE[key] for key in TILE_KEYS]
+
+
+def _grid_payload(classes: np.ndarray, legend) -> Dict:
+    """
+    Turn an (H, W) array of class ids into the generators' structure-of-arrays
+    output; legend[class_id] -> (tile_key, biome).
+
+    Cell i sits at (i % grid_columns, i // grid_columns) and is
+    legend[tile_ids[i]] with CSS biome hook biomes[biome_ids[i]]. The id
+    arrays stay int16 ndarrays; lists are only built by the JSON encoder.
+    """
+    biomes = list(dict.fromkeys(biome for _, biome in legend))
+    tile_lut = np.array([TILE_IDS[tile_key] for tile_key, _ in legend], dtype=np.int16)
+    biome_lut = np.array([biomes.index(biome) for _, biome in legend], dtype=np.int16)
+    flat = classes.ravel()
+    return {
+        "grid_columns": classes.shape[1],
+        "legend": TILE_LEGEND,
+        "biomes": biomes,
+        "tile_ids": tile_lut[flat],
+        "biome_ids": biome_lut[flat],
     }
 
 
+def expand_cells(world: Dict) -> List[Dict]:
+    """
+    Rebuild the old one-dict-per-cell list from a generator's output, for
+    consumers that still want {"x", "y", name, symbol, ..., "biome"} cells.
+    """
+    width = world["grid_columns"]
+    legend, biomes = world["legend"], world["biomes"]
+    tile_ids = np.asarray(world["tile_ids"]).tolist()
+    biome_ids = np.asarray(world["biome_ids"]).tolist()
+    return [
+        {"x": i % width, "y": i // width, **legend[tile_id], "biome": biomes[biome_id]}
+        for i, (tile_id, biome_id) in enumerate(zip(tile_ids, biome_ids))
+    ]
+
+
 # ---------------------------------------------------------
 # 1. Perlin / Simplex Noise terrain
 # ---------------------------------------------------------
 
-def _value_noise(x: float, y: float, rng: random.Random) -> float:
-    """Very simple fallback noise if `noise` is not installed."""
-    # Hash coordinates deterministically with RNG
-    key = (int(x * 73856093) ^ int(y * 19349663)) & 0xFFFFFFFF
-    rng2 = random.Random(key)
-    return rng2.random() * 2.0 - 1.0  # [-1, 1]
+# 8 gradient directions for 2D Perlin noise, split into x / y components
+_GRAD_X = np.array([1, -1, 1, -1, 1, -1, 0, 0], dtype=np.float64)
+_GRAD_Y = np.array([1, 1, -1, -1, 0, 0, 1, -1], dtype=np.float64)
+
+
+_U64 = np.uint64
+
+
+def _lattice_hash(ix: np.ndarray, iy: np.ndarray, seed: int) -> np.ndarray:
+    """splitmix64 of (ix, iy, seed) on uint64 arrays – a stateless lattice hash."""
+    k = (ix.astype(_U64) * _U64(73856093)) ^ (iy.astype(_U64) * _U64(19349663))
+    k ^= _U64(seed & 0xFFFFFFFFFFFFFFFF)
+    k = (k ^ (k >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+    k = (k ^ (k >> _U64(27))) * _U64(0x94D049BB133111EB)
+    return k ^ (k >> _U64(31))
+
+
+def _fade(t: np.ndarray) -> np.ndarray:
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def _perlin_grid(x: np.ndarray, y: np.ndarray, seed: int) -> np.ndarray:
+    """Single-octave 2D gradient noise, evaluated for whole coordinate arrays."""
+    xi = np.floor(x).astype(np.int64)
+    yi = np.floor(y).astype(np.int64)
+    xf = x - xi
+    yf = y - yi
+    u = _fade(xf)
+    v = _fade(yf)
+
+    # Hash each lattice point once (many cells share a lattice square), then
+    # gather the gradient components for the four corners of every cell.
+    x0, y0 = int(xi.min()), int(yi.min())
+    lat_y, lat_x = np.mgrid[y0:int(yi.max()) + 2, x0:int(xi.max()) + 2]
+    g = (_lattice_hash(lat_x, lat_y, seed) & _U64(7)).astype(np.intp).ravel()
+    gx = _GRAD_X[g]
+    gy = _GRAD_Y[g]
+    stride = lat_x.shape[1]
+    base = (yi - y0) * stride + (xi - x0)  # flat index of each cell's (0, 0) corner
+
+    def corner(offset, dx, dy):
+        idx = base + offset
+        return gx.take(idx) * dx + gy.take(idx) * dy
+
+    n00 = corner(0, xf, yf)
+    n10 = corner(1, xf - 1.0, yf)
+    n01 = corner(stride, xf, yf - 1.0)
+    n11 = corner(stride + 1, xf - 1.0, yf - 1.0)
+
+    nx0 = n00 + u * (n10 - n00)
+    nx1 = n01 + u * (n11 - n01)
+    return nx0 + v * (nx1 - nx0)
+
 
+# std of a single _perlin_grid octave; _fractal_noise divides it back out
+PERLIN_OCTAVE_STD = 0.26
 
-def _noise2(x: float, y: float, seed: int) -> float:
-    if pnoise2 is not None:
-        return pnoise2(x, y, octaves=4, persistence=0.5, lacunarity=2.0, base=seed)
-    # fallback: value noise
-    rng = random.Random(seed)
-    return _value_noise(x, y, rng)
+
+def _fractal_noise(x: np.ndarray, y: np.ndarray, seed: int, octaves: int = 4,
+                   persistence: float = 0.5, lacunarity: float = 2.0) -> np.ndarray:
+    """
+    fBm Perlin noise over arrays, spread roughly uniformly over [-1, 1].
+
+    Raw fBm bunches up around 0 (std ~0.16 for 4 octaves), so the biome
+    thresholds in generate_perlin_world – tuned on uniform value noise –
+    would almost never fire. Scale to unit variance, then push through a
+    logistic approximation of the normal CDF to even the values out.
+    """
+    total = np.zeros(np.shape(x), dtype=np.float64)
+    amp, freq, power = 1.0, 1.0, 0.0
+    for _ in range(octaves):
+        total += amp * _perlin_grid(x * freq, y * freq, seed)
+        power += amp * amp
+        amp *= persistence
+        freq *= lacunarity
+    z = total / (math.sqrt(power) * PERLIN_OCTAVE_STD)
+    return 2.0 / (1.0 + np.exp(-1.702 * z)) - 1.0
+
+
+@functools.lru_cache(maxsize=64)
+def _coord_grids(width: int, height: int, scale: float = 1.0,
+                 offset_x: float = 0.0, offset_y: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read-only (xs / scale + offset_x, ys / scale + offset_y) grids, shared by
+    every map of the same size instead of rebuilt per call.
+    """
+    ys, xs = np.mgrid[0:height, 0:width]
+    nx = xs / scale + offset_x
+    ny = ys / scale + offset_y
+    nx.setflags(write=False)
+    ny.setflags(write=False)
+    return nx, ny
 
 
-def generate_perlin_world(theme: str, size: str, seed: int) -> Dict:
+@functools.lru_cache(maxsize=256)
+def _noise_layer(width: int, height: int, scale: float, seed: int, octaves: int,
+                 offset_x: float = 0.0, offset_y: float = 0.0) -> np.ndarray:
+    """
+    fBm layer sampled at (x / scale + offset_x, y / scale + offset_y) for every
+    cell. Cached, since the same seed is often regenerated (theme switches,
+    tuning); the array is read-only because callers share it.
+    """
+    layer = _fractal_noise(*_coord_grids(width, height, scale, offset_x, offset_y), seed, octaves)
+    layer.setflags(write=False)
+    return layer
+
+
+# (tile key, biome) per terrain class produced by generate_perlin_world
+PERLIN_CLASSES = (
+    ("deep_water", "ocean"),
+    ("water", "coast"),
+    ("mountain", "mountain"),
+    ("grass", "steppe"),
+    ("grass", "plains"),
+    ("forest", "forest"),
+    ("town", "settlement"),
+    ("ruins", "ruins"),
+)
+
+
+def generate_perlin_world(theme: str, size: str, seed: int,
+                          octaves: Optional[int] = None) -> Dict:
     """
     Heightmap + moisture noise -> layered biomes.
     Works great for Fantasy / Post-Apoc overworlds.
+    `octaves` defaults to NOISE_OCTAVES for the size.
     """
     width, height = _pick_size(size)
     scale = 12.0  # bigger = smoother
+    octaves = octaves or _pick_octaves(size)
 
-    cells: List[Dict] = []
-
-    for y in range(height):
-        for x in range(width):
-            nx = x / scale
-            ny = y / scale
-
-            h = _noise2(nx, ny, seed)          # height
-            m = _noise2(nx + 100, ny + 100, seed + 7)  # moisture
-
-            # Normalize [-1,1] -> [0,1]
-            h01 = (h + 1.0) / 2.0
-            m01 = (m + 1.0) / 2.0
-
-            # Base thresholds – you can tweak these per theme
-            if h01 < 0.25:
-                tile = BASE_TILES["deep_water"]
-                biome = "ocean"
-            elif h01 < 0.32:
-                tile = BASE_TILES["water"]
-                biome = "coast"
-            else:
-                # land: use moisture for biome
-                if h01 > 0.8:
-                    tile = BASE_TILES["mountain"]
-                    biome = "mountain"
-                elif m01 < 0.25:
-                    tile = BASE_TILES["grass"]
-                    biome = "steppe"
-                elif m01 < 0.55:
-                    tile = BASE_TILES["grass"]
-                    biome = "plains"
-                else:
-                    tile = BASE_TILES["forest"]
-                    biome = "forest"
+    # whole-grid noise layers instead of 3 scalar noise calls per cell
+    h = _noise_layer(width, height, scale, seed, octaves)                    # height
+    m = _noise_layer(width, height, scale, seed + 7, octaves, 100, 100)      # moisture
+    feature_n = _noise_layer(width, height, scale, seed + 13, octaves, 200, -200)
+
+    # Normalize [-1,1] -> [0,1]
+    h01 = (h + 1.0) / 2.0
+    m01 = (m + 1.0) / 2.0
+
+    # Base thresholds – you can tweak these per theme (indices into PERLIN_CLASSES)
+    terrain = np.select(
+        [h01 < 0.25, h01 < 0.32, h01 > 0.8, m01 < 0.25, m01 < 0.55],
+        [0, 1, 2, 3, 4],
+        default=5,
+    )
 
-            # sprinkle towns / ruins using another noise
-            feature_n = _noise2(nx + 200, ny - 200, seed + 13)
-            if h01 > 0.35 and feature_n > 0.72:
-                tile = BASE_TILES["town"]
-                biome = "settlement"
-            elif h01 > 0.45 and feature_n < -0.7:
-                tile = BASE_TILES["ruins"]
-                biome = "ruins"
+    # sprinkle towns / ruins using another noise
+    terrain = np.where((h01 > 0.35) & (feature_n > 0.72), 6,
+                       np.where((h01 > 0.45) & (feature_n < -0.7), 7, terrain))
 
-            cells.append(_cell_payload(tile, x, y, biome))
+    return _grid_payload(terrain, PERLIN_CLASSES)
 
-    return {"grid_columns": width, "map": cells}
-    
 
 # ---------------------------------------------------------
 # 2. Voronoi regions (biomes / factions)
 # ---------------------------------------------------------
 
+# from this many regions on, the EDT's O(W·H) beats brute-force O(W·H·R)
+EDT_MIN_REGIONS = 32
+
+
+def _nearest_center(centers, width: int, height: int) -> np.ndarray:
+    """(H, W) array of the index of each cell's closest center."""
+    if distance_transform_edt is not None and len(centers) >= EDT_MIN_REGIONS:
+        # label each center pixel, then the EDT's nearest-feature indices give
+        # the Voronoi assignment directly (equidistant ties may break either way)
+        background = np.ones((height, width), dtype=bool)
+        labels = np.zeros((height, width), dtype=np.int32)
+        for i in reversed(range(len(centers))):  # first center wins on duplicates
+            cx, cy, _ = centers[i]
+            background[cy, cx] = False
+            labels[cy, cx] = i
+        _, (iy, ix) = distance_transform_edt(background, return_indices=True)
+        return labels[iy, ix]
+
+    # closest center for every cell at once: argmin over an (R, H, W) stack
+    # of squared distances (ties go to the first center, as before)
+    cx = np.array([c[0] for c in centers])
+    cy = np.array([c[1] for c in centers])
+    xs, ys = _coord_grids(width, height)
+    dist = (cx[:, None, None] - xs) ** 2 + (cy[:, None, None] - ys) ** 2
+    return np.argmin(dist, axis=0)
+
+
+# tile keys a Voronoi region can be assigned
+VORONOI_BIOMES = ["grass", "forest", "mountain", "water", "town", "ruins"]
+
+
 def generate_voronoi_world(theme: str, size: str, seed: int, regions: int = 7) -> Dict:
     """
     Large region shards – good for biome / faction overview maps.
     """
     width, height = _pick_size(size)
-    rng = random.Random(seed)
-
-    # random region centers
-    centers = []
-    BIOME_KEYS = ["grass", "forest", "mountain", "water", "town", "ruins"]
-    for _ in range(regions):
-        cx = rng.randint(0, width - 1)
-        cy = rng.randint(0, height - 1)
-        biome_key = rng.choice(BIOME_KEYS)
-        centers.append((cx, cy, biome_key))
-
-    cells: List[Dict] = []
-    for y in range(height):
-        for x in range(width):
-            # choose closest center
-            best = None
-            best_dist = 999999
-            for cx, cy, biome_key in centers:
-                d = (cx - x) ** 2 + (cy - y) ** 2
-                if d < best_dist:
-                    best_dist = d
-                    best = biome_key
-
-            tile = BASE_TILES.get(best, BASE_TILES["grass"])
-            cells.append(_cell_payload(tile, x, y, best))
-
-    return {"grid_columns": width, "map": cells}
+    rng = _rng(seed)
+
+    # random region centers, drawn in three batches
+    centers = list(zip(
+        rng.integers(0, width, size=regions).tolist(),
+        rng.integers(0, height, size=regions).tolist(),
+        rng.choice(VORONOI_BIOMES, size=regions).tolist(),
+    ))
+
+    nearest = _nearest_center(centers, width, height)
+
+    legend = [
+        (biome_key if biome_key in TILE_TEMPLATE else "grass", biome_key)
+        for _, _, biome_key in centers
+    ]
+    return _grid_payload(nearest, legend)
 
 
 # ---------------------------------------------------------
 # 3. Cellular Automata caves / dungeons
 # ---------------------------------------------------------
 
+def _ca_smooth_numpy(grid: np.ndarray, steps: int) -> np.ndarray:
+    # wall counts come from 8 shifted slices of the padded grid
+    # (the border pad of 1s treats outside as wall)
+    for _ in range(steps):
+        p = np.pad(grid, 1, constant_values=1)
+        walls = (
+            p[:-2, :-2] + p[:-2, 1:-1] + p[:-2, 2:]
+            + p[1:-1, :-2] + p[1:-1, 2:]
+            + p[2:, :-2] + p[2:, 1:-1] + p[2:, 2:]
+        )
+        grid = np.where(grid == 1, walls >= 4, walls > 4).astype(np.uint8)
+    return grid
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _ca_smooth_jit(grid, steps):
+        height, width = grid.shape
+        g = grid.copy()
+        out = np.empty_like(g)
+        for _ in range(steps):
+            for y in prange(height):
+                for x in range(width):
+                    walls = 0
+                    for dy in range(-1, 2):
+                        for dx in range(-1, 2):
+                            if dx == 0 and dy == 0:
+                                continue
+                            nx, ny = x + dx, y + dy
+                            if nx < 0 or nx >= width or ny < 0 or ny >= height:
+                                walls += 1  # treat outside as wall
+                            else:
+                                walls += g[ny, nx]
+                    if g[y, x]:
+                        out[y, x] = 1 if walls >= 4 else 0
+                    else:
+                        out[y, x] = 1 if walls > 4 else 0
+            g, out = out, g  # double-buffer, no per-step allocation
+        return g
+else:
+    _ca_smooth_jit = None
+
+if cuda is not None:
+    @cuda.jit
+    def _ca_step_cuda(before, after):
+        # one thread per cell, same rule as _ca_smooth_jit
+        x, y = cuda.grid(2)
+        height, width = before.shape
+        if x >= width or y >= height:
+            return
+        walls = 0
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                if dx == 0 and dy == 0:
+                    continue
+                nx, ny = x + dx, y + dy
+                if nx < 0 or nx >= width or ny < 0 or ny >= height:
+                    walls += 1  # treat outside as wall
+                else:
+                    walls += before[ny, nx]
+        if before[y, x]:
+            after[y, x] = 1 if walls >= 4 else 0
+        else:
+            after[y, x] = 1 if walls > 4 else 0
+
+    def _ca_smooth_cuda(grid, steps):
+        height, width = grid.shape
+        d_g0 = cuda.to_device(np.ascontiguousarray(grid))
+        d_g1 = cuda.device_array_like(d_g0)
+        threads = (16, 16)
+        blocks = ((width + 15) // 16, (height + 15) // 16)
+        for _ in range(steps):
+            _ca_step_cuda[blocks, threads](d_g0, d_g1)
+            d_g0, d_g1 = d_g1, d_g0  # swap on device, no host round-trip
+        return d_g0.copy_to_host()
+else:
+    _ca_smooth_cuda = None
+
+
+@functools.lru_cache(maxsize=None)
+def _cuda_ready() -> bool:
+    # probing the driver is slow, and the answer won't change mid-process
+    return _ca_smooth_cuda is not None and cuda.is_available()
+
+
+# below this many cells NumPy slice sums beat the JIT's thread start-up
+NUMBA_MIN_CELLS = 64 * 64
+# below this many cells host<->device copies eat the GPU's advantage
+CUDA_MIN_CELLS = 512 * 512
+
+
+def _ca_smooth(grid: np.ndarray, steps: int) -> np.ndarray:
+    """Run `steps` cave-smoothing passes over a uint8 wall grid."""
+    if grid.size >= CUDA_MIN_CELLS and _cuda_ready():
+        return _ca_smooth_cuda(grid, steps)
+    if _ca_smooth_jit is not None and grid.size >= NUMBA_MIN_CELLS:
+        return _ca_smooth_jit(grid, steps)
+    return _ca_smooth_numpy(grid, steps)
+
+
+# grid value -> (tile key, biome)
+CAVE_CLASSES = (
+    ("dungeon", "dungeon"),   # floor -> dungeon tile
+    ("mountain", "rock"),     # wall -> rock / mountain / industrial
+)
+
+
 def generate_cellular_world(theme: str, size: str, seed: int) -> Dict:
     """
     Cave-style dungeon using cellular automata.
     Works well for “Ancient Dungeon”, “Ruined Bunker” etc.
     """
     width, height = _pick_size(size)
-    rng = random.Random(seed)
+    rng = _rng(seed)
 
-    # initial random fill: True = wall, False = empty
+    # initial random fill: 1 = wall, 0 = empty
     fill_prob = 0.45
-    grid = [[rng.random() < fill_prob for _ in range(width)] for _ in range(height)]
-
-    def wall_neighbors(g, x, y):
-        c = 0
-        for dy in (-1, 0, 1):
-            for dx in (-1, 0, 1):
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if nx < 0 or nx >= width or ny < 0 or ny >= height:
-                    c += 1  # treat outside as wall
-                elif g[ny][nx]:
-                    c += 1
-        return c
+    grid = (rng.random((height, width)) < fill_prob).astype(np.uint8)
 
     # run smoothing steps
-    for _ in range(5):
-        new = [[False] * width for _ in range(height)]
-        for y in range(height):
-            for x in range(width):
-                walls = wall_neighbors(grid, x, y)
-                if grid[y][x]:
-                    new[y][x] = walls >= 4
-                else:
-                    new[y][x] = walls > 4
-        grid = new
+    grid = _ca_smooth(grid, 5)
 
-    cells: List[Dict] = []
-    for y in range(height):
-        for x in range(width):
-            if grid[y][x]:
-                # wall -> rock / mountain / industrial
-                tile = BASE_TILES["mountain"]
-                biome = "rock"
-            else:
-                # floor -> dungeon tile
-                tile = BASE_TILES["dungeon"]
-                biome = "dungeon"
-            cells.append(_cell_payload(tile, x, y, biome))
-
-    return {"grid_columns": width, "map": cells}
+    return _grid_payload(grid, CAVE_CLASSES)
 
 
 # ---------------------------------------------------------
@@ -349,104 +601,143 @@ WFC_RULES = {
 }
 
 
+# one bit per tile, so a cell's remaining possibilities fit in a uint8 mask
+WFC_BITS = [1 << i for i in range(len(WFC_TILES))]
+WFC_ALL = (1 << len(WFC_TILES)) - 1
+
+# integer direction ids: WFC_DIRS[d] is the WFC_RULES key for direction d
+WFC_DIRS = ("N", "S", "E", "W")
+
+# WFC_RULES_INT[i][d] -> mask of neighbours WFC_TILES[i] allows in direction d
+WFC_RULES_INT = tuple(
+    tuple(sum(WFC_BITS[WFC_TILES.index(t)] for t in WFC_RULES[tile][d]) for d in WFC_DIRS)
+    for tile in WFC_TILES
+)
+
+# WFC_ALLOWED[d][mask] -> union of WFC_RULES_INT over every tile in `mask`,
+# i.e. what a cell holding `mask` still allows in direction d. Empty
+# (contradicted) cells don't constrain their neighbours, so mask 0 -> all.
+WFC_ALLOWED = tuple(
+    tuple(
+        functools.reduce(
+            operator.or_,
+            (rules[d] for bit, rules in zip(WFC_BITS, WFC_RULES_INT) if mask & bit),
+            0,
+        ) if mask else WFC_ALL
+        for mask in range(WFC_ALL + 1)
+    )
+    for d in range(len(WFC_DIRS))
+)
+
+# set bits per mask, i.e. the entropy of a cell holding that mask
+WFC_POPCOUNT = tuple(bin(m).count("1") for m in range(WFC_ALL + 1))
+
+# mask -> its set bits, so picking a tile is randrange(popcount) + one lookup
+WFC_MASK_BITS = tuple(
+    tuple(bit for bit in WFC_BITS if m & bit) for m in range(WFC_ALL + 1)
+)
+
+# mask -> (tile key, biome) of the final tile: lowest remaining bit,
+# contradictions (mask 0) -> road
+WFC_MASK_CLASSES = tuple(
+    (tile, tile)
+    for tile in (
+        WFC_TILES[(m & -m).bit_length() - 1] if m else "road"
+        for m in range(WFC_ALL + 1)
+    )
+)
+
+# (dx, dy, dir id): the neighbour in direction WFC_DIRS[dir] of (x, y)
+# is (x + dx, y + dy)
+_NEIGHBORS = (
+    (0, -1, 0),  # N
+    (0, 1, 1),   # S
+    (1, 0, 2),   # E
+    (-1, 0, 3),  # W
+)
+
+
 def generate_wfc_world(theme: str, size: str, seed: int) -> Dict:
     """
     Small WFC implementation – great for cyberpunk districts or sci-fi stations.
     """
     width, height = _pick_size(size)
-    rng = random.Random(seed)
-
-    # grid of sets – each cell starts as “all tiles possible”
-    possibilities = [[set(WFC_TILES) for _ in range(width)] for _ in range(height)]
-
-    def neighbors(x, y):
-        for dx, dy, d1, d2 in [
-            (0, -1, "N", "S"),
-            (0, 1, "S", "N"),
-            (1, 0, "E", "W"),
-            (-1, 0, "W", "E"),
-        ]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < width and 0 <= ny < height:
-                yield nx, ny, d1, d2
+    rng = _rng(seed)
+
+    # flat row-major grid of bitmasks – each cell starts as “all tiles
+    # possible”; a bytearray keeps the per-cell work below on plain ints
+    possibilities = bytearray()
+    # buckets[e] = cells whose entropy is e, kept in sync with `possibilities`
+    # so collapse() never has to rescan the grid
+    buckets: List[set] = []
+    # uniform [0, 1) draws for collapse(), fetched in bulk: every collapse
+    # fixes a cell for good, so an attempt needs at most two per cell
+    draws = iter(())
+
+    def reset():
+        nonlocal possibilities, buckets, draws
+        possibilities = bytearray([WFC_ALL]) * (width * height)
+        draws = iter(rng.random(2 * width * height).tolist())
+        buckets = [set() for _ in range(len(WFC_TILES) + 1)]
+        buckets[len(WFC_TILES)] = {(x, y) for y in range(height) for x in range(width)}
+
+    def rebucket(x, y, old_mask, new_mask):
+        buckets[WFC_POPCOUNT[old_mask]].discard((x, y))
+        buckets[WFC_POPCOUNT[new_mask]].add((x, y))
 
     def collapse():
         # choose cell with lowest entropy (>1)
-        coords = []
-        min_entropy = 999
-        for y in range(height):
-            for x in range(width):
-                opts = possibilities[y][x]
-                l = len(opts)
-                if l == 1:
-                    continue
-                if l < min_entropy:
-                    min_entropy = l
-                    coords = [(x, y)]
-                elif l == min_entropy:
-                    coords.append((x, y))
-
-        if not coords:
-            return False  # done
-
-        x, y = rng.choice(coords)
-        opts = list(possibilities[y][x])
-        choice = rng.choice(opts)
-        possibilities[y][x] = {choice}
+        for bucket in buckets[2:]:
+            if bucket:
+                break
+        else:
+            return None  # done
+
+        cells = list(bucket)
+        x, y = cells[int(next(draws) * len(cells))]
+        mask = possibilities[y * width + x]
+        choice = WFC_MASK_BITS[mask][int(next(draws) * WFC_POPCOUNT[mask])]
+        possibilities[y * width + x] = choice
+        rebucket(x, y, mask, choice)
+        return x, y
+
+    def propagate(x, y):
+        # worklist: only neighbours of cells that just shrank are re-examined
+        stack = [(x, y)]
+        while stack:
+            cx, cy = stack.pop()
+            mask = possibilities[cy * width + cx]
+            for dx, dy, d in _NEIGHBORS:
+                nx, ny = cx + dx, cy + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    i = ny * width + nx
+                    old = possibilities[i]
+                    new = old & WFC_ALLOWED[d][mask]
+                    if new != old:
+                        possibilities[i] = new
+                        rebucket(nx, ny, old, new)
+                        if not new:
+                            return False  # contradiction
+                        stack.append((nx, ny))
         return True
 
-    def propagate():
-        changed = True
-        while changed:
-            changed = False
-            for y in range(height):
-                for x in range(width):
-                    current = possibilities[y][x]
-                    if not current:
-                        continue
-                    for nx, ny, d1, d2 in neighbors(x, y):
-                        neighbor_opts = possibilities[ny][nx]
-                        allowed = set()
-                        for t in current:
-                            allowed |= set(WFC_RULES[t][d1])
-                        new_neighbor = neighbor_opts & allowed
-                        if new_neighbor != neighbor_opts:
-                            possibilities[ny][nx] = new_neighbor
-                            changed = True
-
     # run WFC – restart if contradictions
     for _ in range(8):
-        # reset
-        possibilities = [[set(WFC_TILES) for _ in range(width)] for _ in range(height)]
+        reset()
         ok = True
         for _ in range(width * height * 4):
-            if not collapse():
+            cell = collapse()
+            if cell is None:
                 break
-            propagate()
-            # check contradiction
-            for row in possibilities:
-                if any(len(c) == 0 for c in row):
-                    ok = False
-                    break
-            if not ok:
+            if not propagate(*cell):
+                ok = False
                 break
         if ok:
             break
 
-    # choose final tile per cell
-    cells: List[Dict] = []
-    for y in range(height):
-        for x in range(width):
-            opts = possibilities[y][x]
-            if not opts:
-                tile_key = "road"
-            else:
-                tile_key = list(opts)[0]
-            base = BASE_TILES[tile_key]
-            biome = tile_key
-            cells.append(_cell_payload(base, x, y, biome))
-
-    return {"grid_columns": width, "map": cells}
+    # final tile per cell is looked up straight from its mask
+    grid = np.frombuffer(possibilities, dtype=np.uint8).reshape(height, width)
+    return _grid_payload(grid, WFC_MASK_CLASSES)
 
 
 # ---------------------------------------------------------